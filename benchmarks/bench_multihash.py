@@ -0,0 +1,61 @@
+"""Measure hash verification of long form DIDs with large documents.
+
+Compares verifying the hash by re-encoding the multihash as base58 and
+comparing strings (the previous approach) with _verified_encoded_doc, which
+encodes the DID once, decodes its multihash from that buffer and compares raw
+digests over a view of the encoded document.
+
+    python benchmarks/bench_multihash.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import timeit
+from hashlib import sha256
+
+from base58 import b58encode
+
+from did_peer_4 import (
+    LONG_PATTERN,
+    MULTIBASE_BASE58_BTC,
+    MULTICODEC_SHA2_256,
+    SHORT_PATTERN,
+    _verified_encoded_doc,
+    encode,
+)
+
+
+def string_compare(did: str) -> str:
+    """Verify the hash the way decode used to."""
+    if SHORT_PATTERN.match(did) or not LONG_PATTERN.match(did):
+        raise ValueError(f"Invalid did:peer:4: {did}")
+
+    hashed, encoded_doc = did[10:].split(":")
+    digest = sha256(encoded_doc.encode()).digest()
+    if (
+        MULTIBASE_BASE58_BTC + b58encode(MULTICODEC_SHA2_256 + digest).decode()
+        != hashed
+    ):
+        raise ValueError(f"Hash is invalid for did: {did}")
+    return encoded_doc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'doc bytes':>10} {'string compare':>15} {'raw digest':>11}")
+    for size in args.sizes:
+        did = encode({"data": "x" * size})
+        assert string_compare(did).encode() == _verified_encoded_doc(did)
+        old = timeit.timeit(lambda: string_compare(did), number=args.number)
+        new = timeit.timeit(lambda: _verified_encoded_doc(did), number=args.number)
+        print(
+            f"{size:>10} {old / args.number * 1e6:>12.1f} us"
+            f" {new / args.number * 1e6:>8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measure the short DID prefilter.
+
+Builds a filter over random short form DIDs, saves it, loads it by memory
+mapping, and reports build time, memory per entry, query latency for known
+and unknown DIDs, and the measured false positive rate.
+
+    python benchmarks/bench_prefilter.py --dids 1000000 --rate 0.001
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from workload import random_short_dids
+
+from did_peer_4.prefilter import ShortDIDFilter
+
+
+def per_query_ns(prefilter: ShortDIDFilter, dids) -> float:
+    start = time.perf_counter_ns()
+    for did in dids:
+        did in prefilter
+    return (time.perf_counter_ns() - start) / len(dids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dids", type=int, default=100000)
+    parser.add_argument("--rate", type=float, default=0.01)
+    parser.add_argument("--queries", type=int, default=100000)
+    args = parser.parse_args()
+
+    dids = random_short_dids(args.dids)
+    others = random_short_dids(args.queries)
+
+    start = time.perf_counter()
+    built = ShortDIDFilter.from_dids(dids, args.rate)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dids.bloom")
+        built.save(path)
+        file_size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        prefilter = ShortDIDFilter.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        with prefilter:
+            known = dids[: args.queries]
+            hit_ns = per_query_ns(prefilter, known)
+            miss_ns = per_query_ns(prefilter, others)
+            false_positives = sum(did in prefilter for did in others)
+
+    print(f"dids:              {len(dids)}")
+    print(f"target fp rate:    {args.rate}")
+    print(f"hashes:            {prefilter.hashes}")
+    print(f"bits per entry:    {prefilter.bits_per_entry:.2f}")
+    print(f"bytes per entry:   {file_size / len(dids):.2f} (file {file_size} B)")
+    print(f"build:             {build_s:.2f} s")
+    print(f"mmap load:         {load_ms:.3f} ms")
+    print(f"query (known):     {hit_ns:.0f} ns")
+    print(f"query (unknown):   {miss_ns:.0f} ns")
+    print(f"measured fp rate:  {false_positives / len(others):.5f}")
+
+
+if __name__ == "__main__":
+    main()
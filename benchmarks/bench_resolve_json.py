@@ -0,0 +1,73 @@
+"""Measure serialized resolution of long form DIDs by document size.
+
+Compares splicing resolution values into the decoded document text, as
+resolve_json does, with loading the text, contextualizing it as resolve does
+and dumping it again. Decoding the DID is the same for both and is excluded.
+
+    python benchmarks/bench_resolve_json.py --keys 1 2 4 8 16 32
+"""
+
+import argparse
+import json
+import timeit
+
+from did_peer_4 import (
+    _decode_doc_text,
+    _verified_encoded_doc,
+    contextualize_document,
+    encode,
+    long_to_short,
+)
+from did_peer_4.input_doc import Multikey, input_doc_from_keys_and_services
+from did_peer_4.splice import splice_resolution
+
+MULTIKEY = "z6MkrCD1csqtgdj8sjrsu8jxcbeyP6m7LiK87NzhfWqio5yr"
+
+
+def make_did(keys: int) -> str:
+    """Return a long form DID whose document has the given number of keys."""
+    return encode(
+        input_doc_from_keys_and_services(
+            [
+                Multikey(multikey=MULTIKEY, relationships=["authentication"])
+                for _ in range(keys)
+            ]
+        )
+    )
+
+
+def load_and_dump(doc: str, did: str, also_known_as: str) -> str:
+    """Resolve the way resolve does, then serialize."""
+    document = contextualize_document(did, json.loads(doc))
+    document.setdefault("alsoKnownAs", []).append(also_known_as)
+    return json.dumps(document, separators=(",", ":"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'keys':>5} {'doc bytes':>10} {'load and dump':>14} {'splice':>10}")
+    for keys in args.keys:
+        did = make_did(keys)
+        doc = _decode_doc_text(_verified_encoded_doc(did))
+        short = long_to_short(did)
+        assert splice_resolution(doc, did, short) == load_and_dump(doc, did, short)
+        old = min(
+            timeit.repeat(lambda: load_and_dump(doc, did, short), number=args.number)
+        )
+        new = min(
+            timeit.repeat(
+                lambda: splice_resolution(doc, did, short), number=args.number
+            )
+        )
+        print(
+            f"{keys:>5} {len(doc):>10} {old / args.number * 1e6:>11.1f} us"
+            f" {new / args.number * 1e6:>7.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Measure throughput of the local resolution service.
+
+Starts ``python -m did_peer_4.server`` in a subprocess (or targets an already
+running service with --port) and drives it from client threads, each holding
+one keep-alive connection, for a fixed duration.
+
+    python benchmarks/bench_server.py --clients 8 --dids 1000 --duration 10
+"""
+
+import argparse
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+
+from did_peer_4 import encode, long_to_short
+from did_peer_4.input_doc import Multikey, input_doc_from_keys_and_services
+
+MULTIKEY = "z6MkrCD1csqtgdj8sjrsu8jxcbeyP6m7LiK87NzhfWqio5yr"
+
+
+def make_dids(count: int):
+    """Return count distinct long form DIDs."""
+    return [
+        encode(
+            input_doc_from_keys_and_services(
+                [Multikey(multikey=MULTIKEY, relationships=["authentication"])],
+                [
+                    {
+                        "id": "#didcomm-0",
+                        "type": "DIDCommMessaging",
+                        "serviceEndpoint": f"https://example.com/{index}",
+                    }
+                ],
+            )
+        )
+        for index in range(count)
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("Resolver service did not start")
+
+
+def client(port: int, paths, deadline: float, seed: int, counts, errors):
+    rng = random.Random(seed)
+    conn = HTTPConnection("127.0.0.1", port)
+    done = 0
+    while time.monotonic() < deadline:
+        conn.request("GET", rng.choice(paths))
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            errors.append(response.status)
+        done += 1
+    conn.close()
+    counts.append(done)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, help="Use a running service")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--dids", type=int, default=1000)
+    parser.add_argument("--short", action="store_true", help="Also hit short forms")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    dids = make_dids(args.dids)
+    paths = [f"/1.0/identifiers/{did}" for did in dids]
+    if args.short:
+        paths += [f"/1.0/identifiers/{long_to_short(did)}" for did in dids]
+
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "did_peer_4.server",
+                "--port",
+                str(port),
+                "--workers",
+                str(args.workers),
+                "--cache-size",
+                str(len(paths)),
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+    try:
+        wait_for(port)
+        # Warm the cache so short forms resolve and misses do not skew results
+        conn = HTTPConnection("127.0.0.1", port)
+        for path in paths:
+            conn.request("GET", path)
+            conn.getresponse().read()
+        conn.close()
+
+        counts, errors = [], []
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(
+                target=client, args=(port, paths, deadline, seed, counts, errors)
+            )
+            for seed in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    total = sum(counts)
+    print(f"clients:  {args.clients}")
+    print(f"dids:     {len(paths)}")
+    print(f"requests: {total}")
+    print(f"errors:   {len(errors)}")
+    print(f"req/s:    {total / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    main()
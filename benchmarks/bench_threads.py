@@ -0,0 +1,91 @@
+"""Measure how resolve and encode throughput scales with thread count.
+
+Each thread runs the operation in a tight loop over its own share of a fixed
+number of calls. On builds with the GIL, throughput stays roughly flat as
+threads are added; on free-threaded builds (e.g. CPython 3.13t) it should
+scale with the number of cores.
+
+    python benchmarks/bench_threads.py --threads 1 2 4 8 --calls 20000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from did_peer_4 import encode, resolve
+from did_peer_4.input_doc import Multikey, input_doc_from_keys_and_services
+
+DOC = input_doc_from_keys_and_services(
+    [
+        Multikey(
+            multikey="z6MkrCD1csqtgdj8sjrsu8jxcbeyP6m7LiK87NzhfWqio5yr",
+            relationships=["authentication", "assertionMethod"],
+        ),
+        Multikey(
+            multikey="z6LSqPZfn9krvgXma2icTMKf2uVcYhKXsudCmPoUzqGYW24U",
+            relationships=["keyAgreement"],
+        ),
+    ],
+    [
+        {
+            "id": "#didcomm-0",
+            "type": "DIDCommMessaging",
+            "serviceEndpoint": {
+                "uri": "https://example.com/didcomm",
+                "accept": ["didcomm/v2"],
+            },
+        }
+    ],
+)
+DID = encode(DOC)
+OPERATIONS = {
+    "resolve": lambda: resolve(DID),
+    "encode": lambda: encode(DOC),
+}
+
+
+def run(operation, threads: int, calls: int) -> float:
+    """Return calls per second for operation split across threads."""
+    per_thread = calls // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def _worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            operation()
+
+    workers = [threading.Thread(target=_worker) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("operations", nargs="*", default=list(OPERATIONS))
+    args = parser.parse_args()
+
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, gil {'enabled' if gil else 'disabled'}")
+    print(f"cpus {os.cpu_count()}")
+    print(f"{'operation':<10} {'threads':>7} {'calls/s':>10} {'speedup':>8}")
+    for name in args.operations:
+        operation = OPERATIONS[name]
+        run(operation, 1, min(args.calls, 1000))  # warm up
+        baseline = None
+        for threads in args.threads:
+            rate = run(operation, threads, args.calls)
+            baseline = baseline or rate
+            print(f"{name:<10} {threads:>7} {rate:>10.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
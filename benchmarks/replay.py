@@ -0,0 +1,135 @@
+"""Replay a synthetic workload at a target rate and report tail latency.
+
+Requests from workload.generate_requests are issued open loop: request i is
+scheduled at start + i / rate regardless of how long earlier requests took,
+and its latency is measured from its scheduled time. A harness that falls
+behind therefore reports the queueing delay it caused rather than hiding it.
+
+    python benchmarks/replay.py --population 1000 --rate 500 --duration 10
+
+The population is generated from the workload arguments, or loaded from a file
+written by workload.py with --population-file.
+"""
+
+import argparse
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+from workload import (
+    Peer,
+    add_arguments,
+    config_from_args,
+    generate_population,
+    generate_requests,
+    load_population,
+)
+
+from did_peer_4 import encode, resolve, resolve_json, resolve_short
+
+OPERATIONS: Dict[str, Callable[[Peer], object]] = {
+    "resolve": lambda peer: resolve(peer.long),
+    "resolve_short": lambda peer: resolve_short(peer.long),
+    "resolve_json": lambda peer: resolve_json(peer.long),
+    "encode": lambda peer: encode(peer.document),
+}
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Return the nearest rank percentile of sorted values."""
+    if not ordered:
+        return float("nan")
+    # The rank is ceil(fraction * n); rounding first drops float error, so
+    # that 0.07 * 100 is rank 7 rather than 8
+    rank = math.ceil(round(fraction * len(ordered), 9))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+def replay(requests, rate: float, duration: float, threads: int):
+    """Issue requests at rate for duration across threads.
+
+    Returns latencies in seconds per operation, the number of errors, and the
+    elapsed wall time.
+    """
+    total = int(rate * duration)
+    schedule = [next(requests) for _ in range(total)]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors = [0]
+    lock = threading.Lock()
+    start = time.perf_counter() + 0.1
+
+    def _worker(offset: int):
+        local: Dict[str, List[float]] = defaultdict(list)
+        failed = 0
+        # Worker n issues requests n, n + threads, n + 2 * threads, ...
+        for index in range(offset, total, threads):
+            operation, peer = schedule[index]
+            scheduled = start + index / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                OPERATIONS[operation](peer)
+            except Exception:
+                failed += 1
+            local[operation].append(time.perf_counter() - scheduled)
+        with lock:
+            for operation, values in local.items():
+                latencies[operation].extend(values)
+            errors[0] += failed
+
+    workers = [
+        threading.Thread(target=_worker, args=(offset,)) for offset in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def report(latencies: Dict[str, List[float]], errors: int, elapsed: float):
+    """Print throughput and latency percentiles."""
+    everything = sorted(value for values in latencies.values() for value in values)
+    print(f"requests:   {len(everything)}")
+    print(f"errors:     {errors}")
+    print(f"throughput: {len(everything) / elapsed:.0f} req/s")
+    print(f"{'operation':<14} {'count':>7} {'p50 us':>9} {'p99 us':>9} {'p999 us':>9}")
+    for operation, values in sorted(latencies.items()) + [("all", everything)]:
+        ordered = sorted(values)
+        p50, p99, p999 = (
+            percentile(ordered, fraction) * 1e6 for fraction in (0.5, 0.99, 0.999)
+        )
+        print(f"{operation:<14} {len(ordered):>7} {p50:>9.0f} {p99:>9.0f} {p999:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--rate", type=float, default=500, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--population-file",
+        type=argparse.FileType("r"),
+        help="Population written by workload.py, instead of generating one",
+    )
+    args = parser.parse_args()
+    config = config_from_args(args)
+    unknown = {operation for operation, _ in config.mix} - set(OPERATIONS)
+    if unknown:
+        parser.error(f"Unknown operations: {', '.join(sorted(unknown))}")
+
+    if args.population_file:
+        with args.population_file as f:
+            population = load_population(f)
+    else:
+        population = generate_population(config)
+    requests = generate_requests(population, config)
+    report(*replay(requests, args.rate, args.duration, args.threads))
+
+
+if __name__ == "__main__":
+    main()
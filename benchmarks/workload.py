@@ -0,0 +1,239 @@
+"""Generate reproducible synthetic did:peer:4 workloads.
+
+A population is a list of peers, each with an input document built with
+input_doc_from_keys_and_services from random Multikey and JsonWebKey2020 keys
+and DIDComm services, and its long and short form DIDs. The number of keys,
+services and routing keys per document is drawn uniformly between configurable
+bounds, and peers are requested with Zipf distributed popularity; the same seed
+always yields the same population and request stream.
+
+A population can be saved as JSON lines and replayed later with
+replay.py --population-file:
+
+    python benchmarks/workload.py --population 1000 --seed 1 > population.jsonl
+"""
+
+import argparse
+import base64
+import itertools
+import json
+import os
+import random
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+from base58 import b58encode
+
+from did_peer_4 import (
+    BASE58_ALPHABET,
+    MULTICODEC_SHA2_256,
+    encode,
+    long_to_short,
+)
+from did_peer_4.input_doc import (
+    RELATIONSHIPS,
+    JsonWebKey2020,
+    Multikey,
+    input_doc_from_keys_and_services,
+)
+
+
+@dataclass
+class WorkloadConfig:
+    """Parameters of a synthetic workload."""
+
+    population: int = 1000
+    seed: int = 0
+    # Keys and services per document: uniform between min and max
+    min_keys: int = 1
+    max_keys: int = 4
+    min_services: int = 0
+    max_services: int = 2
+    # Routing keys per service: uniform between 0 and max
+    max_routing_keys: int = 2
+    # Fraction of keys that are JsonWebKey2020 rather than Multikey
+    jwk_fraction: float = 0.25
+    # Zipf exponent of peer popularity; 0 requests every peer equally often
+    zipf: float = 1.1
+    # Relative frequency of each operation in the request stream
+    mix: Tuple[Tuple[str, float], ...] = (("resolve", 0.9), ("encode", 0.1))
+
+
+@dataclass
+class Peer:
+    """A member of a population."""
+
+    document: dict
+    long: str
+    short: str
+
+
+def _multikey(rng: random.Random, prefix: str) -> str:
+    return prefix + "".join(rng.choices(BASE58_ALPHABET, k=44))
+
+
+def _jwk(rng: random.Random, curve: str) -> dict:
+    x = base64.urlsafe_b64encode(rng.randbytes(32)).rstrip(b"=").decode()
+    return {"kty": "OKP", "crv": curve, "x": x}
+
+
+def _key(rng: random.Random, config: WorkloadConfig, index: int):
+    agreement = index % 2 == 1
+    relationships = (
+        ["keyAgreement"]
+        if agreement
+        else rng.sample([r for r in RELATIONSHIPS if r != "keyAgreement"], k=2)
+    )
+    if rng.random() < config.jwk_fraction:
+        return JsonWebKey2020(
+            jwk=_jwk(rng, "X25519" if agreement else "Ed25519"),
+            relationships=relationships,
+        )
+    return Multikey(
+        multikey=_multikey(rng, "z6LS" if agreement else "z6Mk"),
+        relationships=relationships,
+    )
+
+
+def _service(rng: random.Random, config: WorkloadConfig, index: int) -> dict:
+    host = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 16)))
+    return {
+        "id": f"#didcomm-{index}",
+        "type": "DIDCommMessaging",
+        "serviceEndpoint": {
+            "uri": f"https://{host}.example.com/didcomm",
+            "accept": ["didcomm/v2"],
+            "routingKeys": [
+                f"did:key:{_multikey(rng, 'z6LS')}#key-0"
+                for _ in range(rng.randint(0, config.max_routing_keys))
+            ],
+        },
+    }
+
+
+def generate_document(rng: random.Random, config: WorkloadConfig) -> dict:
+    """Return a random input document."""
+    keys = [
+        _key(rng, config, index)
+        for index in range(rng.randint(config.min_keys, config.max_keys))
+    ]
+    services = [
+        _service(rng, config, index)
+        for index in range(rng.randint(config.min_services, config.max_services))
+    ]
+    return input_doc_from_keys_and_services(keys, services or None)
+
+
+def generate_population(config: WorkloadConfig) -> List[Peer]:
+    """Return the population described by config."""
+    rng = random.Random(config.seed)
+    population = []
+    for _ in range(config.population):
+        document = generate_document(rng, config)
+        long = encode(document)
+        population.append(Peer(document, long, long_to_short(long)))
+    return population
+
+
+def random_short_dids(count: int) -> List[str]:
+    """Return count short form DIDs with random hashes, for filter workloads."""
+    return [
+        "did:peer:4z" + b58encode(MULTICODEC_SHA2_256 + os.urandom(32)).decode()
+        for _ in range(count)
+    ]
+
+
+def dump_population(population: Iterable[Peer], out: TextIO):
+    """Write a population as JSON lines for load_population."""
+    for peer in population:
+        json.dump({"document": peer.document, "long": peer.long}, out)
+        out.write("\n")
+
+
+def load_population(lines: Iterable[str]) -> List[Peer]:
+    """Load a population saved as JSON lines by this script."""
+    population = []
+    for line in lines:
+        if line.strip():
+            entry = json.loads(line)
+            long = entry["long"]
+            population.append(Peer(entry["document"], long, long_to_short(long)))
+    return population
+
+
+def generate_requests(
+    population: List[Peer], config: WorkloadConfig
+) -> Iterator[Tuple[str, Peer]]:
+    """Yield an endless, reproducible stream of (operation, peer) requests.
+
+    Peers are requested with Zipf distributed popularity in population order,
+    so the first peer is the most popular.
+    """
+    rng = random.Random(config.seed + 1)
+    weights = [1 / rank**config.zipf for rank in range(1, len(population) + 1)]
+    cum_weights = list(itertools.accumulate(weights))
+    operations = [operation for operation, _ in config.mix]
+    op_weights = list(itertools.accumulate(weight for _, weight in config.mix))
+    while True:
+        peers = rng.choices(population, cum_weights=cum_weights, k=1024)
+        ops = rng.choices(operations, cum_weights=op_weights, k=1024)
+        yield from zip(ops, peers)
+
+
+def parse_mix(value: str) -> Tuple[Tuple[str, float], ...]:
+    """Parse an operation mix such as resolve=0.9,encode=0.1."""
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        operation, _, weight = part.partition("=")
+        mix[operation.strip()] = float(weight or 1)
+    return tuple(mix.items())
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add workload configuration arguments to parser."""
+    defaults = WorkloadConfig()
+    parser.add_argument("--population", type=int, default=defaults.population)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--min-keys", type=int, default=defaults.min_keys)
+    parser.add_argument("--max-keys", type=int, default=defaults.max_keys)
+    parser.add_argument("--min-services", type=int, default=defaults.min_services)
+    parser.add_argument("--max-services", type=int, default=defaults.max_services)
+    parser.add_argument(
+        "--max-routing-keys", type=int, default=defaults.max_routing_keys
+    )
+    parser.add_argument("--jwk-fraction", type=float, default=defaults.jwk_fraction)
+    parser.add_argument("--zipf", type=float, default=defaults.zipf)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=defaults.mix,
+        help="Operation weights, e.g. resolve=0.9,encode=0.1",
+    )
+
+
+def config_from_args(args: argparse.Namespace) -> WorkloadConfig:
+    """Build a workload configuration from parsed arguments."""
+    return WorkloadConfig(
+        population=args.population,
+        seed=args.seed,
+        min_keys=args.min_keys,
+        max_keys=args.max_keys,
+        min_services=args.min_services,
+        max_services=args.max_services,
+        max_routing_keys=args.max_routing_keys,
+        jwk_fraction=args.jwk_fraction,
+        zipf=args.zipf,
+        mix=args.mix,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    config = config_from_args(parser.parse_args())
+    dump_population(generate_population(config), sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
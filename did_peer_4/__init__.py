@@ -1,9 +1,21 @@
+"""did:peer:4 encoding, decoding, and resolution.
+
+Functions in this package are re-entrant, so they may be called concurrently
+from any number of threads, including on free-threaded builds of CPython. The
+only shared mutable state is the multihash registry, which register updates
+under a lock and which encoding and decoding DIDs never consult. Documents
+passed in are never modified; a document must not be modified by another thread
+while it is being encoded.
+"""
+
+import hmac
 import json
 import re
-from typing import Any, Callable, Dict, Optional, Union
-from base58 import b58decode, b58encode
 from hashlib import sha256
+from typing import Any, Callable, Dict, Optional, Union
+from base58 import b58encode
 
+from .splice import splice_resolution
 from .valid import validate_input_document
 
 # Regex patterns
@@ -18,6 +30,8 @@ MULTICODEC_JSON = b"\x80\x04"
 MULTICODEC_SHA2_256 = b"\x12\x20"
 MULTIBASE_BASE58_BTC = "z"
 
+_B58_VALUES = {char: value for value, char in enumerate(BASE58_ALPHABET.encode())}
+
 
 def _encode_doc(document: Dict[str, Any]) -> str:
     """Encode the document."""
@@ -29,19 +43,43 @@ def _encode_doc(document: Dict[str, Any]) -> str:
     )
 
 
-def _decode_doc(encoded_doc: str) -> Dict[str, Any]:
-    """Decode the document."""
-    encoding = encoded_doc[0]
-    encoded = encoded_doc[1:]
-    if encoding != MULTIBASE_BASE58_BTC:
-        raise ValueError(f"Unsupported encoding: {encoding}")
+def _b58decode(encoded: Union[str, bytes, memoryview]) -> bytes:
+    """Decode base58btc.
 
-    decoded_bytes = b58decode(encoded)
+    Equivalent to base58.b58decode but converts the decoded integer to bytes
+    directly instead of accumulating a list of every output byte. ASCII bytes
+    and views of them are decoded in place rather than copied.
+    """
+    if isinstance(encoded, str):
+        encoded = encoded.encode("ascii")
+    zeros = 0
+    while zeros < len(encoded) and encoded[zeros] == 0x31:  # leading "1"s
+        zeros += 1
+
+    acc = 0
+    try:
+        for char in encoded[zeros:]:
+            acc = acc * 58 + _B58_VALUES[char]
+    except KeyError as err:
+        raise ValueError(f"Invalid character {chr(err.args[0])!r}") from None
+    return b"\0" * zeros + acc.to_bytes((acc.bit_length() + 7) // 8, "big")
+
+
+def _decode_doc_text(encoded_doc: Union[bytes, memoryview]) -> str:
+    """Decode the ASCII encoded document, returning the serialized JSON."""
+    if encoded_doc[:1] != MULTIBASE_BASE58_BTC.encode():
+        raise ValueError(f"Unsupported encoding: {bytes(encoded_doc[:1]).decode()}")
+
+    decoded_bytes = _b58decode(encoded_doc[1:])
     if not decoded_bytes.startswith(MULTICODEC_JSON):
         raise ValueError(f"Unsupported multicodec: {decoded_bytes[:2]}...")
 
-    value = decoded_bytes[2:]
-    return json.loads(value)
+    return decoded_bytes[2:].decode()
+
+
+def _decode_doc(encoded_doc: Union[bytes, memoryview]) -> Dict[str, Any]:
+    """Decode the document."""
+    return json.loads(_decode_doc_text(encoded_doc))
 
 
 def _hash_encoded_doc(encoded_doc: str) -> str:
@@ -60,7 +98,9 @@ def encode(
 ) -> str:
     """Encode an input document into a did:peer:4."""
     if validate:
-        document = dict(validate_input_document(document))
+        validate_input_document(document)
+    if not isinstance(document, dict):
+        document = dict(document)
     encoded_doc = _encode_doc(document)
     hashed = _hash_encoded_doc(encoded_doc)
     return f"did:peer:4{hashed}:{encoded_doc}"
@@ -75,8 +115,12 @@ def encode_short(
     return f"did:peer:4{hashed}"
 
 
-def decode(did: str) -> Dict[str, Any]:
-    """Decode a did:peer:4 into a document."""
+def _verified_encoded_doc(did: str) -> memoryview:
+    """Check the did and its hash, returning a view of the encoded document.
+
+    The view is over an ASCII copy of the did, the only copy made; the hash and
+    the document are both decoded from it.
+    """
     if not did.startswith("did:peer:4"):
         raise ValueError(f"Invalid did:peer:4: {did}")
 
@@ -86,11 +130,22 @@ def decode(did: str) -> Dict[str, Any]:
     if not LONG_PATTERN.match(did):
         raise ValueError(f"Invalid did:peer:4: {did}")
 
-    hashed, encoded_doc = did[10:].split(":")
-    if _hash_encoded_doc(encoded_doc) != hashed:
+    # The pattern only admits ASCII, base58btc and sha2-256 (zQm)
+    buf = memoryview(did.encode())
+    separator = did.index(":", 10)
+    mh = _b58decode(buf[11:separator])
+    encoded_doc = buf[separator + 1 :]
+    if mh[:2] != MULTICODEC_SHA2_256 or not hmac.compare_digest(
+        sha256(encoded_doc).digest(), mh[2:]
+    ):
         raise ValueError(f"Hash is invalid for did: {did}")
 
-    return _decode_doc(encoded_doc)
+    return encoded_doc
+
+
+def decode(did: str) -> Dict[str, Any]:
+    """Decode a did:peer:4 into a document."""
+    return _decode_doc(_verified_encoded_doc(did))
 
 
 def _operate_on_embedded(
@@ -119,6 +174,7 @@ def _visit_verification_methods(document: dict, visitor: Callable[[dict], dict])
     if verification_methods:
         document["verificationMethod"] = [visitor(vm) for vm in verification_methods]
 
+    adapter = _operate_on_embedded(visitor)
     for relationship in (
         "authentication",
         "assertionMethod",
@@ -128,9 +184,7 @@ def _visit_verification_methods(document: dict, visitor: Callable[[dict], dict])
     ):
         vms_and_refs = document.get(relationship)
         if vms_and_refs:
-            document[relationship] = [
-                _operate_on_embedded(visitor)(vm) for vm in vms_and_refs
-            ]
+            document[relationship] = [adapter(vm) for vm in vms_and_refs]
 
     return document
 
@@ -141,12 +195,15 @@ def contextualize_document(did: str, document: dict) -> dict:
     This includes setting the id and alsoKnownAs fields as well as setting the
     controller for all verification methods (including verification methods
     embedded in verification relationships), if not already set.
+
+    The given document is not modified. The returned document is a copy that
+    shares any values left unchanged by contextualization with the original.
     """
-    document["id"] = did
+    document = {**document, "id": did}
 
     def _visitor(value: dict):
         if "controller" not in value:
-            value["controller"] = did
+            return {**value, "controller": did}
         return value
 
     document = _visit_verification_methods(document, _visitor)
@@ -185,6 +242,29 @@ def resolve_short(did: str):
     return document
 
 
+def resolve_json(did: str) -> bytes:
+    """Resolve a did:peer:4 into a serialized document.
+
+    did is expected to be long form.
+    The result is the UTF-8 encoded JSON of the document returned by resolve,
+    produced by splicing resolution values into the encoded document rather
+    than loading and dumping it.
+    """
+    doc = _decode_doc_text(_verified_encoded_doc(did))
+    return splice_resolution(doc, did, long_to_short(did)).encode()
+
+
+def resolve_short_json(did: str) -> bytes:
+    """Resolve the short form document variant of a did:peer:4, serialized.
+
+    did is expected to be long form.
+    The result is the UTF-8 encoded JSON of the document returned by
+    resolve_short.
+    """
+    doc = _decode_doc_text(_verified_encoded_doc(did))
+    return splice_resolution(doc, long_to_short(did), did).encode()
+
+
 def resolve_short_from_doc(
     document: Dict[str, Any], did: Optional[str] = None
 ) -> Dict[str, Any]:
@@ -207,6 +287,8 @@ __all__ = [
     "decode",
     "resolve",
     "resolve_short",
+    "resolve_json",
+    "resolve_short_json",
     "resolve_short_from_doc",
     "validate_input_document",
 ]
@@ -0,0 +1,169 @@
+"""Compare successive long form DIDs of the same peer.
+
+When a peer rotates keys or updates its services, it shares a new long form
+DID. diff_dids reports which verification methods, verification relationships,
+and services changed between two such DIDs, without resolving either one.
+"""
+
+from copy import deepcopy
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Mapping, Tuple
+
+from . import LONG_PATTERN, _verified_encoded_doc, decode
+from .input_doc import RELATIONSHIPS
+
+RESOURCE_KEYS = ("verificationMethod", "service", *RELATIONSHIPS)
+
+
+@dataclass(frozen=True)
+class ResourceDiff:
+    """Changes to a set of resources, keyed by resource id."""
+
+    added: Dict[str, dict] = field(default_factory=dict)
+    removed: Dict[str, dict] = field(default_factory=dict)
+    changed: Dict[str, Tuple[dict, dict]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        """Return whether anything changed."""
+        return bool(self.added or self.removed or self.changed)
+
+
+@dataclass(frozen=True)
+class RelationshipDiff:
+    """Ids added to and removed from a verification relationship."""
+
+    added: Tuple[str, ...] = ()
+    removed: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        """Return whether anything changed."""
+        return bool(self.added or self.removed)
+
+
+@dataclass(frozen=True)
+class DocumentDiff:
+    """Changes between the documents of two long form DIDs.
+
+    verification_methods includes verification methods embedded in
+    relationships. relationships only contains relationships that changed.
+    properties lists any other top level properties that changed.
+    """
+
+    verification_methods: ResourceDiff = field(default_factory=ResourceDiff)
+    relationships: Dict[str, RelationshipDiff] = field(default_factory=dict)
+    services: ResourceDiff = field(default_factory=ResourceDiff)
+    properties: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        """Return whether anything changed."""
+        return bool(
+            self.verification_methods
+            or self.relationships
+            or self.services
+            or self.properties
+        )
+
+
+@lru_cache(maxsize=256)
+def _cached_decode(did: str) -> Dict[str, Any]:
+    """Decode a DID, caching the result.
+
+    The returned document is shared between callers and must not be modified.
+    """
+    return decode(did)
+
+
+def _resource_id(key: str, index: int, resource: dict) -> str:
+    ident = resource.get("id")
+    return ident if isinstance(ident, str) else f"{key}[{index}]"
+
+
+def _verification_methods(document: Mapping[str, Any]) -> Iterator[Tuple[str, dict]]:
+    """Yield all verification methods, including embedded ones, by id."""
+    for key in ("verificationMethod", *RELATIONSHIPS):
+        for index, vm in enumerate(document.get(key) or ()):
+            if isinstance(vm, dict):
+                yield _resource_id(key, index, vm), vm
+
+
+def _services(document: Mapping[str, Any]) -> Iterator[Tuple[str, dict]]:
+    """Yield all services by id."""
+    for index, service in enumerate(document.get("service") or ()):
+        if isinstance(service, dict):
+            yield _resource_id("service", index, service), service
+
+
+def _relationship_ids(document: Mapping[str, Any], relationship: str):
+    """Return the ids of the refs and embedded vms of a relationship."""
+    return tuple(
+        vm if isinstance(vm, str) else _resource_id(relationship, index, vm)
+        for index, vm in enumerate(document.get(relationship) or ())
+        if isinstance(vm, (str, dict))
+    )
+
+
+def _diff_resources(old: Dict[str, dict], new: Dict[str, dict]) -> ResourceDiff:
+    return ResourceDiff(
+        added={ident: deepcopy(res) for ident, res in new.items() if ident not in old},
+        removed={
+            ident: deepcopy(res) for ident, res in old.items() if ident not in new
+        },
+        changed={
+            ident: (deepcopy(res), deepcopy(new[ident]))
+            for ident, res in old.items()
+            if ident in new and res != new[ident]
+        },
+    )
+
+
+def _diff_relationship(old: Tuple[str, ...], new: Tuple[str, ...]):
+    return RelationshipDiff(
+        added=tuple(ident for ident in new if ident not in old),
+        removed=tuple(ident for ident in old if ident not in new),
+    )
+
+
+def diff_documents(old: Mapping[str, Any], new: Mapping[str, Any]) -> DocumentDiff:
+    """Compare two decoded (input) documents.
+
+    Values in the returned diff are copies and may be modified freely.
+    """
+    relationships = {}
+    for relationship in RELATIONSHIPS:
+        rel_diff = _diff_relationship(
+            _relationship_ids(old, relationship), _relationship_ids(new, relationship)
+        )
+        if rel_diff:
+            relationships[relationship] = rel_diff
+
+    return DocumentDiff(
+        verification_methods=_diff_resources(
+            dict(_verification_methods(old)), dict(_verification_methods(new))
+        ),
+        relationships=relationships,
+        services=_diff_resources(dict(_services(old)), dict(_services(new))),
+        properties=tuple(
+            key
+            for key in {**old, **new}
+            if key not in RESOURCE_KEYS and old.get(key) != new.get(key)
+        ),
+    )
+
+
+def diff_dids(old: str, new: str) -> DocumentDiff:
+    """Compare the documents of two long form did:peer:4 DIDs.
+
+    Identical DIDs are verified and reported unchanged without being decoded.
+    Otherwise both DIDs are decoded and verified; decoded documents are cached,
+    so comparing a DID against each of its successors decodes it only once.
+    """
+    for did in (old, new):
+        if not LONG_PATTERN.match(did):
+            raise ValueError(f"DID is not a long form did:peer:4: {did}")
+
+    if old == new:
+        _verified_encoded_doc(old)
+        return DocumentDiff()
+
+    return diff_documents(_cached_decode(old), _cached_decode(new))
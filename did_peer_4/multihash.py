@@ -0,0 +1,95 @@
+"""Multihash encoding and verification.
+
+A multihash is a varint hash function code, a varint digest length, and the
+digest. Hash functions are looked up by code in a registry of hashlib
+constructors, which callers can extend with register. Registering is safe
+from any thread, concurrently with hashing, but a registered code can not be
+replaced.
+
+Data to hash may be any bytes-like object; passing a memoryview over a larger
+buffer hashes that part of the buffer without copying it.
+
+did:peer:4 DIDs always use sha2-256, which the package verifies with hashlib
+directly, so no registration can change how DIDs are verified.
+"""
+
+import hashlib
+import hmac
+import threading
+from typing import Callable, Dict, Tuple
+
+SHA2_256 = 0x12
+SHA2_512 = 0x13
+SHA3_512 = 0x14
+SHA3_256 = 0x16
+BLAKE2B_256 = 0xB220
+
+# code -> (hashlib constructor, digest length)
+REGISTRY: Dict[int, Tuple[Callable[..., "hashlib._Hash"], int]] = {
+    SHA2_256: (hashlib.sha256, 32),
+    SHA2_512: (hashlib.sha512, 64),
+    SHA3_512: (hashlib.sha3_512, 64),
+    SHA3_256: (hashlib.sha3_256, 32),
+    BLAKE2B_256: (lambda data=b"": hashlib.blake2b(data, digest_size=32), 32),
+}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register(code: int, constructor: Callable[..., "hashlib._Hash"], length: int):
+    """Register a hash function for a multihash code not yet registered."""
+    with _REGISTRY_LOCK:
+        if code in REGISTRY:
+            raise ValueError(f"Multihash already registered: 0x{code:x}")
+        REGISTRY[code] = (constructor, length)
+
+
+def _encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _decode_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Decode a varint at offset, returning the value and the next offset."""
+    value = shift = 0
+    for index in range(offset, min(len(data), offset + 9)):
+        byte = data[index]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, index + 1
+        shift += 7
+    raise ValueError("Invalid varint in multihash")
+
+
+def decode(multihash: bytes) -> Tuple[int, bytes]:
+    """Split a multihash into its hash function code and digest."""
+    code, offset = _decode_varint(multihash, 0)
+    length, offset = _decode_varint(multihash, offset)
+    digest = multihash[offset:]
+    if len(digest) != length:
+        raise ValueError("Multihash digest length does not match")
+    return code, digest
+
+
+def digest(code: int, data) -> bytes:
+    """Hash data with the hash function registered for code."""
+    try:
+        constructor, _ = REGISTRY[code]
+    except KeyError:
+        raise ValueError(f"Unsupported multihash: 0x{code:x}") from None
+    return constructor(data).digest()
+
+
+def encode(code: int, data) -> bytes:
+    """Return the multihash of data using the hash function for code."""
+    hashed = digest(code, data)
+    return _encode_varint(code) + _encode_varint(len(hashed)) + hashed
+
+
+def verify(multihash: bytes, data) -> bool:
+    """Return whether multihash is a hash of data."""
+    code, expected = decode(multihash)
+    return hmac.compare_digest(digest(code, data), expected)
@@ -0,0 +1,198 @@
+"""Probabilistic membership prefilter for short form DIDs.
+
+A ShortDIDFilter is a Bloom filter over short form did:peer:4 DIDs (as returned
+by long_to_short and encode_short). It answers "definitely unknown" or
+"probably known" without touching a database, using a configurable number of
+bits per DID. Filters can be saved to a file and loaded by memory mapping, so
+that many processes on a host share one copy of the filter.
+"""
+
+import math
+import mmap
+import os
+import struct
+import threading
+from hashlib import blake2b
+from typing import Iterable, Optional, Union
+
+from . import SHORT_PATTERN
+
+MAGIC = b"DP4BLOOM"
+VERSION = 1
+# magic, version, hashes, reserved, bits, count, salt
+HEADER = struct.Struct("<8sBBHQQ16s")
+SALT_SIZE = 16
+
+_MASK64 = (1 << 64) - 1
+
+
+class ShortDIDFilter:
+    """Bloom filter over short form did:peer:4 DIDs.
+
+    Membership tests never give false negatives. False positives occur at
+    roughly the rate the filter was sized for, as long as no more DIDs than
+    its capacity are added.
+    """
+
+    def __init__(
+        self,
+        bits: int,
+        hashes: int,
+        salt: Optional[bytes] = None,
+        data: Optional[Union[bytearray, memoryview]] = None,
+        count: int = 0,
+    ):
+        """Initialize an empty filter, or one over existing data.
+
+        Most callers should use for_capacity, from_dids, or load instead.
+        """
+        if bits <= 0 or not 0 < hashes < 256:
+            raise ValueError("bits must be positive and hashes in 1..255")
+        if salt is not None and len(salt) != SALT_SIZE:
+            raise ValueError(f"salt must be {SALT_SIZE} bytes")
+
+        self.bits = bits
+        self.hashes = hashes
+        self.salt = salt if salt is not None else os.urandom(SALT_SIZE)
+        self.count = count
+        self._data = data if data is not None else bytearray((bits + 7) // 8)
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+        if len(self._data) != (bits + 7) // 8:
+            raise ValueError("data does not match number of bits")
+
+    @classmethod
+    def for_capacity(
+        cls, capacity: int, false_positive_rate: float = 0.01
+    ) -> "ShortDIDFilter":
+        """Create an empty filter sized for capacity DIDs."""
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+
+        capacity = max(capacity, 1)
+        bits = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, hashes)
+
+    @classmethod
+    def from_dids(
+        cls, dids: Iterable[str], false_positive_rate: float = 0.01
+    ) -> "ShortDIDFilter":
+        """Create a filter containing dids."""
+        dids = list(dids)
+        prefilter = cls.for_capacity(len(dids), false_positive_rate)
+        for did in dids:
+            prefilter.add(did)
+        return prefilter
+
+    def _hashes(self, did: str):
+        """Return two independent 64 bit hashes of did."""
+        digest = blake2b(did.encode(), digest_size=16, key=self.salt).digest()
+        value = int.from_bytes(digest, "little")
+        return value & _MASK64, (value >> 64) | 1
+
+    def add(self, did: str):
+        """Add a short form DID to the filter.
+
+        Safe to call concurrently with add and membership tests.
+        """
+        if not SHORT_PATTERN.match(did):
+            raise ValueError(f"DID is not a short form did:peer:4: {did}")
+        if isinstance(self._data, memoryview) and self._data.readonly:
+            raise ValueError("Filter is read-only")
+
+        # Double hashing: the i-th index is (h1 + i * h2) % bits
+        data, bits = self._data, self.bits
+        h1, h2 = self._hashes(did)
+        with self._lock:
+            for _ in range(self.hashes):
+                index = h1 % bits
+                data[index >> 3] |= 1 << (index & 7)
+                h1 += h2
+            self.count += 1
+
+    def __contains__(self, did: object) -> bool:
+        """Return whether did is probably in the filter.
+
+        did is not validated; anything other than a short form DID that was
+        added is reported absent, barring false positives.
+        """
+        if not isinstance(did, str):
+            return False
+        data, bits = self._data, self.bits
+        h1, h2 = self._hashes(did)
+        for _ in range(self.hashes):
+            index = h1 % bits
+            if not data[index >> 3] >> (index & 7) & 1:
+                return False
+            h1 += h2
+        return True
+
+    def __len__(self) -> int:
+        """Return the number of DIDs added to the filter."""
+        return self.count
+
+    @property
+    def size(self) -> int:
+        """Return the size of the bit array in bytes."""
+        return len(self._data)
+
+    @property
+    def bits_per_entry(self) -> float:
+        """Return the number of bits used per DID added."""
+        return self.bits / max(self.count, 1)
+
+    @property
+    def expected_false_positive_rate(self) -> float:
+        """Return the expected false positive rate at the current count."""
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def save(self, path: Union[str, "os.PathLike[str]"]):
+        """Write the filter to path."""
+        header = HEADER.pack(
+            MAGIC, VERSION, self.hashes, 0, self.bits, self.count, self.salt
+        )
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(self._data)
+
+    @classmethod
+    def load(cls, path: Union[str, "os.PathLike[str]"]) -> "ShortDIDFilter":
+        """Load a filter from path by memory mapping it.
+
+        The loaded filter is read-only; call close (or use it as a context
+        manager) to release the mapping.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(mapped) < HEADER.size:
+                raise ValueError(f"Not a did:peer:4 filter file: {path}")
+            magic, version, hashes, _, bits, count, salt = HEADER.unpack_from(mapped)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a did:peer:4 filter file: {path}")
+            if len(mapped) != HEADER.size + (bits + 7) // 8 or not hashes:
+                raise ValueError(f"Corrupt did:peer:4 filter file: {path}")
+        except Exception:
+            mapped.close()
+            raise
+
+        prefilter = cls(bits, hashes, salt, memoryview(mapped)[HEADER.size :], count)
+        prefilter._mmap = mapped
+        return prefilter
+
+    def close(self):
+        """Release the memory mapping of a loaded filter."""
+        if self._mmap is not None:
+            self._data.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "ShortDIDFilter":
+        """Enter context."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Exit context, closing the filter."""
+        self.close()
@@ -0,0 +1,390 @@
+"""Local DID resolution HTTP service.
+
+Serves resolution of did:peer:4 over the Universal Resolver HTTP interface,
+``GET /1.0/identifiers/{did}``, so that many processes on a host can share one
+resolver and its cache. Only the standard library is used.
+
+Run with::
+
+    python -m did_peer_4.server --port 8080
+
+Long form DIDs are resolved to the long form document. Short form DIDs can only
+be resolved once their long form has been seen by this server; until then they
+are reported as not found.
+"""
+
+import argparse
+import json
+import logging
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from . import (
+    LONG_PATTERN,
+    SHORT_PATTERN,
+    long_to_short,
+    resolve_json,
+    resolve_short_json,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+PATH_PREFIX = "/1.0/identifiers/"
+DID_CONTENT_TYPE = "application/did+ld+json"
+RESOLUTION_RESULT_CONTENT_TYPE = (
+    'application/ld+json;profile="https://w3id.org/did-resolution"'
+)
+RESOLUTION_RESULT_PROFILE = "https://w3id.org/did-resolution"
+ACCEPTABLE = (
+    "*/*",
+    "application/*",
+    "application/did+ld+json",
+    "application/did+json",
+    "application/ld+json",
+    "application/json",
+)
+
+
+class ResolutionCache:
+    """Thread-safe LRU cache of serialized documents keyed by DID.
+
+    The cache also remembers the long form of each short form DID it has seen
+    so that short form DIDs can be resolved without their long form.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """Initialize the cache."""
+        self.max_entries = max_entries
+        self._documents: "OrderedDict[str, bytes]" = OrderedDict()
+        self._long_forms: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _put(self, store: OrderedDict, key: str, value):
+        store[key] = value
+        store.move_to_end(key)
+        if len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def resolve(self, did: str) -> bytes:
+        """Return the serialized document for a long or short form DID.
+
+        Raises ValueError for invalid DIDs and LookupError for short form DIDs
+        whose long form is unknown.
+        """
+        with self._lock:
+            document = self._documents.get(did)
+            if document is not None:
+                self._documents.move_to_end(did)
+                self.hits += 1
+                return document
+            self.misses += 1
+            long = self._long_forms.get(did)
+
+        # Resolve outside of the lock; concurrent misses for the same DID
+        # resolve twice but yield identical documents.
+        if LONG_PATTERN.match(did):
+            long = did
+            document = resolve_json(did)
+        elif SHORT_PATTERN.match(did):
+            if long is None:
+                raise LookupError(f"Long form of DID is unknown: {did}")
+            document = resolve_short_json(long)
+        else:
+            raise ValueError(f"Invalid did:peer:4: {did}")
+
+        with self._lock:
+            self._put(self._documents, did, document)
+            self._put(self._long_forms, long_to_short(long), long)
+        return document
+
+    def __len__(self) -> int:
+        """Return the number of cached documents."""
+        return len(self._documents)
+
+
+def _resolution_result(document: Optional[bytes], metadata: dict) -> bytes:
+    """Wrap a serialized document in a DID resolution result."""
+    return b"".join(
+        (
+            b'{"@context":"https://w3id.org/did-resolution/v1","didDocument":',
+            document if document is not None else b"null",
+            b',"didResolutionMetadata":',
+            json.dumps(metadata, separators=(",", ":")).encode(),
+            b',"didDocumentMetadata":{}}',
+        )
+    )
+
+
+def _wants_resolution_result(accept: str) -> Tuple[bool, bool]:
+    """Parse an accept header.
+
+    Returns whether a resolution result was requested and whether any of the
+    requested representations can be served at all.
+    """
+    if not accept:
+        return False, True
+
+    acceptable = False
+    for media_range in accept.split(","):
+        media_type, _, params = media_range.partition(";")
+        media_type = media_type.strip().lower()
+        if media_type == "application/ld+json" and RESOLUTION_RESULT_PROFILE in params:
+            return True, True
+        if media_type in ACCEPTABLE:
+            acceptable = True
+    return False, acceptable
+
+
+class ResolverRequestHandler(BaseHTTPRequestHandler):
+    """Handle Universal Resolver requests."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm stalls each keep-alive response on the client's delayed ack.
+    disable_nagle_algorithm = True
+    server: "ResolverServer"
+
+    def __init__(self, request, client_address, server):
+        """Set up the connection without handling any requests.
+
+        The server calls handle_one_request each time the connection becomes
+        readable, and finish once it is closed.
+        """
+        self.request = request
+        self.client_address = client_address
+        self.server = server
+        self.close_connection = True
+        self.setup()
+
+    def log_message(self, format, *args):
+        """Log requests through logging rather than to stderr."""
+        LOGGER.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_error(self, status: int, error: str):
+        """Send a resolution error."""
+        body = _resolution_result(None, {"error": error})
+        self._send(status, body, RESOLUTION_RESULT_CONTENT_TYPE)
+
+    def do_GET(self):
+        """Resolve the DID in the request path."""
+        content_length = self.headers.get("Content-Length")
+        if content_length not in (None, "0"):
+            # No request body is expected; refuse rather than read it
+            self.close_connection = True
+            self._send_error(413, "invalidRequest")
+            return
+
+        path = urlsplit(self.path).path
+        if not path.startswith(PATH_PREFIX):
+            self._send_error(404, "notFound")
+            return
+
+        did = unquote(path[len(PATH_PREFIX) :])
+        if len(did) > self.server.max_did_length:
+            self._send_error(414, "invalidDid")
+            return
+
+        result, acceptable = _wants_resolution_result(self.headers.get("Accept", ""))
+        if not acceptable:
+            self._send_error(406, "representationNotSupported")
+            return
+
+        try:
+            document = self.server.cache.resolve(did)
+        except LookupError:
+            self._send_error(404, "notFound")
+            return
+        except ValueError:
+            self._send_error(400, "invalidDid")
+            return
+
+        if result:
+            body = _resolution_result(document, {"contentType": DID_CONTENT_TYPE})
+            self._send(200, body, RESOLUTION_RESULT_CONTENT_TYPE)
+        else:
+            self._send(200, document, DID_CONTENT_TYPE)
+
+    do_HEAD = do_GET
+
+
+class ResolverServer(HTTPServer):
+    """HTTP server handling requests on a fixed pool of worker threads.
+
+    Connections are kept alive between requests, but only hold a worker while
+    a request is being handled. Idle connections wait in a selector until they
+    become readable, and are closed after idle_timeout seconds, so idle
+    clients cannot starve new ones of workers.
+    """
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        workers: int = 16,
+        cache: Optional[ResolutionCache] = None,
+        max_did_length: int = 16384,
+        idle_timeout: float = 5.0,
+    ):
+        """Initialize the server."""
+        super().__init__(server_address, ResolverRequestHandler)
+        self.cache = cache if cache is not None else ResolutionCache()
+        self.max_did_length = max_did_length
+        self.idle_timeout = idle_timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="did-peer-4-resolver"
+        )
+        self._selector = selectors.DefaultSelector()
+        self._waiting: List[ResolverRequestHandler] = []
+        self._waiting_lock = threading.Lock()
+        self._wakeup, self._wakeup_write = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self._selector.register(self._wakeup, selectors.EVENT_READ)
+        self._closed = False
+        self._poller = threading.Thread(
+            target=self._poll, name="did-peer-4-resolver-poller", daemon=True
+        )
+        self._poller.start()
+
+    def process_request(self, request, client_address):
+        """Wait for a request on the new connection."""
+        request.settimeout(self.idle_timeout)
+        try:
+            connection = self.RequestHandlerClass(request, client_address, self)
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        self._wait(connection)
+
+    def _wait(self, connection: ResolverRequestHandler):
+        """Hand a connection to the poller until it becomes readable."""
+        with self._waiting_lock:
+            self._waiting.append(connection)
+        self._wakeup_write.send(b"\0")
+
+    def _poll(self):
+        """Dispatch readable connections to the pool; close idle ones."""
+        deadlines = {}
+        while not self._closed:
+            for key, _ in self._selector.select(timeout=min(self.idle_timeout, 1)):
+                if key.fileobj is self._wakeup:
+                    try:
+                        self._wakeup.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._selector.unregister(key.fileobj)
+                del deadlines[key.data]
+                self._pool.submit(self._serve, key.data)
+
+            with self._waiting_lock:
+                waiting, self._waiting = self._waiting, []
+            now = time.monotonic()
+            for connection in waiting:
+                self._selector.register(
+                    connection.request, selectors.EVENT_READ, connection
+                )
+                deadlines[connection] = now + self.idle_timeout
+
+            for connection, deadline in list(deadlines.items()):
+                if deadline <= now:
+                    self._selector.unregister(connection.request)
+                    del deadlines[connection]
+                    self._close(connection)
+
+        for connection in deadlines:
+            self._close(connection)
+
+    def _serve(self, connection: ResolverRequestHandler):
+        """Handle the requests a connection has sent, then wait for more."""
+        try:
+            while True:
+                connection.handle_one_request()
+                if connection.close_connection:
+                    break
+                if not self._pending(connection):
+                    self._wait(connection)
+                    return
+        except Exception:
+            self.handle_error(connection.request, connection.client_address)
+        self._close(connection)
+
+    def _pending(self, connection: ResolverRequestHandler) -> bool:
+        """Return whether a request is already readable on a connection."""
+        connection.request.setblocking(False)
+        try:
+            return bool(connection.rfile.peek(1))
+        finally:
+            connection.request.settimeout(self.idle_timeout)
+
+    def _close(self, connection: ResolverRequestHandler):
+        try:
+            connection.finish()
+        except Exception:
+            pass
+        self.shutdown_request(connection.request)
+
+    def server_close(self):
+        """Close the server, idle connections, and wait for workers to finish."""
+        super().server_close()
+        self._closed = True
+        self._wakeup_write.send(b"\0")
+        self._poller.join()
+        self._pool.shutdown(wait=True)
+        with self._waiting_lock:
+            waiting, self._waiting = self._waiting, []
+        for connection in waiting:
+            self._close(connection)
+        self._selector.close()
+        self._wakeup.close()
+        self._wakeup_write.close()
+
+
+def main(argv=None):
+    """Run the resolver service."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    parser.add_argument("--max-did-length", type=int, default=16384)
+    parser.add_argument("--idle-timeout", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    server = ResolverServer(
+        (args.host, args.port),
+        workers=args.workers,
+        cache=ResolutionCache(args.cache_size),
+        max_did_length=args.max_did_length,
+        idle_timeout=args.idle_timeout,
+    )
+    LOGGER.info("Serving did:peer:4 resolution on %s:%d", *server.server_address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
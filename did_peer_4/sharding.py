@@ -0,0 +1,175 @@
+"""Shard a resolution cache across nodes with consistent hashing.
+
+Each DID is owned by one node, chosen by placing the DID's multihash on a hash
+ring of node positions. Both forms of a DID share a multihash and so share an
+owner. Adding or removing a node only moves the DIDs in the ring segments that
+node gains or loses, roughly 1/n of all DIDs.
+
+How nodes are reached is left to a Transport; InProcessTransport keeps every
+node's cache in the current process, for tests and single-host setups.
+"""
+
+import threading
+from bisect import bisect_right
+from hashlib import sha256
+from typing import Dict, Iterable, List, Optional, Protocol, Tuple
+
+from . import (
+    LONG_PATTERN,
+    SHORT_PATTERN,
+    _b58decode,
+    _verified_encoded_doc,
+    long_to_short,
+    multihash,
+    resolve_json,
+    resolve_short_json,
+)
+
+
+def ring_position(did: str) -> int:
+    """Return the position of a did:peer:4 on the hash ring.
+
+    The position is taken from the digest of the DID's multihash, which is
+    already uniformly distributed, so no further hashing is needed.
+    """
+    if not (SHORT_PATTERN.match(did) or LONG_PATTERN.match(did)):
+        raise ValueError(f"Invalid did:peer:4: {did}")
+    _, digest = multihash.decode(_b58decode(did[11:57]))
+    return int.from_bytes(digest[:8], "big")
+
+
+def _node_positions(node: str, replicas: int) -> List[int]:
+    return [
+        int.from_bytes(sha256(f"{node}#{replica}".encode()).digest()[:8], "big")
+        for replica in range(replicas)
+    ]
+
+
+class HashRing:
+    """Consistent hash ring of named nodes.
+
+    Each node is placed at replicas positions on the ring to even out the
+    share of DIDs each node owns. Lookups are safe to run concurrently with
+    add_node and remove_node.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        """Initialize the ring."""
+        self.replicas = replicas
+        self._ring: Tuple[Tuple[int, ...], Tuple[str, ...]] = ((), ())
+        self._lock = threading.Lock()
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        """Return the nodes on the ring."""
+        return sorted(set(self._ring[1]))
+
+    def _rebuild(self, points: List[Tuple[int, str]]):
+        points.sort()
+        self._ring = (
+            tuple(position for position, _ in points),
+            tuple(node for _, node in points),
+        )
+
+    def add_node(self, node: str):
+        """Add a node to the ring."""
+        with self._lock:
+            if node in self._ring[1]:
+                raise ValueError(f"Node already on ring: {node}")
+            points = list(zip(*self._ring))
+            points.extend(
+                (position, node) for position in _node_positions(node, self.replicas)
+            )
+            self._rebuild(points)
+
+    def remove_node(self, node: str):
+        """Remove a node from the ring."""
+        with self._lock:
+            if node not in self._ring[1]:
+                raise ValueError(f"Node not on ring: {node}")
+            self._rebuild([point for point in zip(*self._ring) if point[1] != node])
+
+    def owner(self, did: str) -> str:
+        """Return the node owning a did:peer:4, in either form."""
+        positions, nodes = self._ring
+        if not nodes:
+            raise LookupError("No nodes on ring")
+        index = bisect_right(positions, ring_position(did))
+        return nodes[index % len(nodes)]
+
+
+class Transport(Protocol):
+    """Access to the caches held by nodes."""
+
+    def get(self, node: str, key: str) -> Optional[bytes]:
+        """Return the value cached under key on node, if any."""
+        ...
+
+    def put(self, node: str, key: str, value: bytes):
+        """Cache value under key on node."""
+        ...
+
+
+class InProcessTransport:
+    """Transport holding every node's cache in this process."""
+
+    def __init__(self):
+        """Initialize the transport."""
+        self.caches: Dict[str, Dict[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, node: str, key: str) -> Optional[bytes]:
+        """Return the value cached under key on node, if any."""
+        with self._lock:
+            return self.caches.get(node, {}).get(key)
+
+    def put(self, node: str, key: str, value: bytes):
+        """Cache value under key on node."""
+        with self._lock:
+            self.caches.setdefault(node, {})[key] = value
+
+
+class ShardedResolver:
+    """Resolve DIDs through a cache sharded across the nodes of a ring.
+
+    Resolved documents are cached, serialized, on the node owning the DID
+    under the DID they were resolved for: the long form document under the
+    long form DID and the short form document under the short form DID.
+    """
+
+    def __init__(self, ring: HashRing, transport: Transport):
+        """Initialize the resolver."""
+        self.ring = ring
+        self.transport = transport
+
+    def resolve_json(self, did: str) -> bytes:
+        """Return the serialized long form document of a long form DID."""
+        node = self.ring.owner(did)
+        document = self.transport.get(node, did)
+        if document is None:
+            document = resolve_json(did)
+            self.transport.put(node, did, document)
+        return document
+
+    def resolve_short_json(self, did: str) -> bytes:
+        """Return the serialized short form document of a long form DID."""
+        # The cache key is shared by every long form with the same hash, so
+        # the document has to be checked against the hash even on a hit
+        _verified_encoded_doc(did)
+        node = self.ring.owner(did)
+        short = long_to_short(did)
+        document = self.transport.get(node, short)
+        if document is None:
+            document = resolve_short_json(did)
+            self.transport.put(node, short, document)
+        return document
+
+    def cached(self, did: str) -> Optional[bytes]:
+        """Return the cached document for a DID in either form, if any.
+
+        Short form DIDs can only be resolved from cache, after the short form
+        document has been resolved from the long form DID.
+        """
+        return self.transport.get(self.ring.owner(did), did)
@@ -0,0 +1,149 @@
+"""Splice resolution values into serialized documents.
+
+Resolution only adds a handful of values to the decoded document: the id, a
+controller on each verification method that lacks one, and an alsoKnownAs
+entry. Rather than loading the whole document and serializing it again, the
+functions in this module walk the serialized document once, recording where
+those values belong, and splice them into the original text.
+"""
+
+import json
+from json.decoder import WHITESPACE, scanstring
+from json.encoder import encode_basestring_ascii
+from typing import List, Tuple
+
+_DECODER = json.JSONDecoder()
+
+VERIFICATION_METHOD_KEYS = frozenset(
+    (
+        "verificationMethod",
+        "authentication",
+        "assertionMethod",
+        "keyAgreement",
+        "capabilityInvocation",
+        "capabilityDelegation",
+    )
+)
+
+_WS = " \t\n\r"
+
+# (start, end, replacement) spans applied to the serialized document
+_Splice = Tuple[int, int, str]
+
+
+def _skip_whitespace(doc: str, idx: int) -> int:
+    # Documents from encode are compact; only run the regex on whitespace
+    if doc[idx : idx + 1] in _WS:
+        return WHITESPACE.match(doc, idx).end()
+    return idx
+
+
+def _scan_value(doc: str, idx: int):
+    """Scan one JSON value starting at idx, returning the value and its end."""
+    try:
+        return _DECODER.scan_once(doc, idx)
+    except StopIteration as err:
+        raise ValueError(f"Invalid JSON value at position {err.value}") from None
+
+
+def _expect(doc: str, idx: int, char: str):
+    if doc[idx : idx + 1] != char:
+        raise ValueError(f"Expected {char!r} at position {idx}")
+
+
+def _splice_controllers(
+    doc: str, idx: int, controller: str, splices: List[_Splice]
+) -> int:
+    """Record a controller splice for each embedded vm lacking one.
+
+    idx must point at the opening bracket of a list of vms and refs. Returns the
+    index just past the closing bracket.
+    """
+    idx = _skip_whitespace(doc, idx + 1)
+    if doc[idx : idx + 1] == "]":
+        return idx + 1
+
+    while True:
+        value, end = _scan_value(doc, idx)
+        if isinstance(value, dict) and "controller" not in value:
+            fragment = f'"controller":{controller}'
+            # end - 1 is the closing brace of the vm
+            splices.append((end - 1, end - 1, f",{fragment}" if value else fragment))
+        idx = _skip_whitespace(doc, end)
+        if doc[idx : idx + 1] == "]":
+            return idx + 1
+        _expect(doc, idx, ",")
+        idx = _skip_whitespace(doc, idx + 1)
+
+
+def splice_resolution(doc: str, did: str, also_known_as: str) -> str:
+    """Contextualize a serialized document with the given DID.
+
+    The result is equivalent to serializing the output of contextualize_document
+    after appending also_known_as to alsoKnownAs. When doc is compact JSON (as
+    produced by encode), the result is byte-for-byte what json.dumps with
+    compact separators would produce for the resolved document.
+    """
+    # What json.dumps returns for a str, without its per-call setup
+    did_json = encode_basestring_ascii(did)
+    aka_json = encode_basestring_ascii(also_known_as)
+    splices: List[_Splice] = []
+    seen_id = seen_aka = False
+
+    idx = _skip_whitespace(doc, 0)
+    if doc[idx : idx + 1] != "{":
+        raise ValueError("Document must be a JSON object")
+    idx = _skip_whitespace(doc, idx + 1)
+    empty = doc[idx : idx + 1] == "}"
+
+    while not empty:
+        _expect(doc, idx, '"')
+        key, idx = scanstring(doc, idx + 1)
+        idx = _skip_whitespace(doc, idx)
+        _expect(doc, idx, ":")
+        idx = _skip_whitespace(doc, idx + 1)
+
+        if key in VERIFICATION_METHOD_KEYS and doc[idx : idx + 1] == "[":
+            idx = _splice_controllers(doc, idx, did_json, splices)
+        elif key == "alsoKnownAs":
+            value, end = _scan_value(doc, idx)
+            if not isinstance(value, list):
+                raise ValueError("alsoKnownAs must be a list")
+            # end - 1 is the closing bracket of the list
+            splices.append((end - 1, end - 1, f",{aka_json}" if value else aka_json))
+            seen_aka = True
+            idx = end
+        elif key == "id":
+            _, end = _scan_value(doc, idx)
+            splices.append((idx, end, did_json))
+            seen_id = True
+            idx = end
+        else:
+            _, idx = _scan_value(doc, idx)
+
+        idx = _skip_whitespace(doc, idx)
+        if doc[idx : idx + 1] == "}":
+            break
+        _expect(doc, idx, ",")
+        idx = _skip_whitespace(doc, idx + 1)
+
+    if _skip_whitespace(doc, idx + 1) != len(doc):
+        raise ValueError("Unexpected data after document")
+
+    tail = []
+    if not seen_id:
+        tail.append(f'"id":{did_json}')
+    if not seen_aka:
+        tail.append(f'"alsoKnownAs":[{aka_json}]')
+    if tail:
+        fragment = ",".join(tail)
+        splices.append((idx, idx, fragment if empty else f",{fragment}"))
+
+    parts = []
+    last = 0
+    for start, end, replacement in splices:
+        parts.append(doc[last:start])
+        parts.append(replacement)
+        last = end
+    parts.append(doc[last:])
+    return "".join(parts)
@@ -1,15 +1,29 @@
+import copy
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+import base58
+import pytest
 
 from did_peer_4 import (
+    _b58decode,
+    _encode_doc,
+    _hash_encoded_doc,
+    contextualize_document,
     decode,
     encode,
     encode_short,
     long_to_short,
+    multihash,
     resolve,
+    resolve_json,
     resolve_short,
     resolve_short_from_doc,
+    resolve_short_json,
 )
+from did_peer_4.splice import splice_resolution
 
+from . import EXAMPLES
 
 DOC = {
     "@context": [
@@ -60,6 +74,43 @@ def test_encode_decode():
     assert resolve_short_from_doc(DOC, long_to_short(encoded)) == resolve_short(encoded)
 
 
+def tampered_did() -> str:
+    did = encode(DOC)
+    other = encode({**DOC, "alsoKnownAs": ["did:example:other"]})
+    return did[: did.index(":", 10)] + other[other.index(":", 10) :]
+
+
+def test_decode_tampered():
+    with pytest.raises(ValueError):
+        decode(tampered_did())
+
+
+def test_decode_ignores_registry():
+    tampered = tampered_did()
+    _, digest = multihash.decode(_b58decode(tampered[11:57]))
+
+    class Forged:
+        def __init__(self, data=b""):
+            pass
+
+        def digest(self):
+            return digest
+
+    original = multihash.REGISTRY[multihash.SHA2_256]
+    multihash.REGISTRY[multihash.SHA2_256] = (Forged, 32)
+    try:
+        with pytest.raises(ValueError):
+            decode(tampered)
+    finally:
+        multihash.REGISTRY[multihash.SHA2_256] = original
+
+
+@pytest.mark.parametrize("encoded", ["", "1", "111", "z", "1z", "2NEpo7TZRRrLZSi2U"])
+def test_b58decode(encoded):
+    assert _b58decode(encoded) == base58.b58decode(encoded)
+    assert _b58decode(memoryview(encoded.encode())) == base58.b58decode(encoded)
+
+
 def test_resolve():
     encoded = encode(DOC)
     print()
@@ -72,6 +123,88 @@ def test_resolve_short():
     print(json.dumps(resolve_short(encoded), indent=2))
 
 
+def test_contextualize_does_not_mutate():
+    document = copy.deepcopy(DOC)
+    document["authentication"].append({"id": "#embedded", "type": "Multikey"})
+    original = copy.deepcopy(document)
+    contextualized = contextualize_document("did:example:123", document)
+    assert document == original
+    assert contextualized["id"] == "did:example:123"
+    assert contextualized["authentication"][-1]["controller"] == "did:example:123"
+
+
+def test_concurrent_use():
+    dids = [encode({**DOC, "alsoKnownAs": [f"did:example:{i}"]}) for i in range(8)]
+    expected = [resolve(did) for did in dids]
+
+    def _work(index: int):
+        did = dids[index % len(dids)]
+        assert encode(decode(did)) == did
+        return resolve(did)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(_work, range(64)))
+    assert results == expected * 8
+
+
+def _compact(document: dict) -> bytes:
+    return json.dumps(document, separators=(",", ":")).encode()
+
+
+@pytest.mark.parametrize(
+    "document",
+    [
+        DOC,
+        {"hello": "world"},
+        {"alsoKnownAs": []},
+        {"alsoKnownAs": ["did:example:123"]},
+        {"verificationMethod": [{}, {"id": "#a", "controller": "did:example:1"}]},
+        {"authentication": ["#a", {"id": "#b", "type": "Multikey"}]},
+    ],
+)
+def test_resolve_json(document):
+    encoded = encode(document, validate=False)
+    assert resolve_json(encoded) == _compact(resolve(encoded))
+    assert resolve_short_json(encoded) == _compact(resolve_short(encoded))
+
+
+@pytest.mark.parametrize("example", EXAMPLES)
+def test_resolve_json_examples(example):
+    with open(example) as f:
+        encoded = encode(json.load(f))
+    assert resolve_json(encoded) == _compact(resolve(encoded))
+    assert resolve_short_json(encoded) == _compact(resolve_short(encoded))
+
+
+def test_resolve_json_replaces_id():
+    encoded = encode({"id": "did:example:123", "hello": "world"}, validate=False)
+    assert resolve_json(encoded) == _compact(resolve(encoded))
+
+
+def test_resolve_json_not_compact():
+    """Documents encoded by other implementations may contain whitespace."""
+    payload = json.dumps(DOC, indent=2)
+    doc = json.loads(splice_resolution(payload, "did:example:1", "did:example:2"))
+    assert doc["id"] == "did:example:1"
+    assert doc["alsoKnownAs"] == ["did:example:2"]
+    assert all(vm["controller"] == "did:example:1" for vm in doc["verificationMethod"])
+
+
+def test_resolve_json_empty_document():
+    doc = _encode_doc({})
+    encoded = f"did:peer:4{_hash_encoded_doc(doc)}:{doc}"
+    assert resolve_json(encoded) == _compact(resolve(encoded))
+
+
+@pytest.mark.parametrize(
+    "payload",
+    ["[]", '{"alsoKnownAs": "not a list"}', '{"a": 1} {}', '{"a" 1}', '{"a": }'],
+)
+def test_splice_resolution_invalid(payload):
+    with pytest.raises(ValueError):
+        splice_resolution(payload, "did:example:1", "did:example:2")
+
+
 def test_stats():
     encoded = encode(DOC)
     plain = json.dumps(DOC, separators=(",", ":"))
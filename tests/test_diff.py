@@ -0,0 +1,89 @@
+import copy
+
+import pytest
+
+from did_peer_4 import encode
+from did_peer_4.diff import (
+    DocumentDiff,
+    RelationshipDiff,
+    _cached_decode,
+    diff_dids,
+)
+
+from .test_did_peer_4 import DOC
+
+NEW_KEY = {
+    "id": "#6MkNew",
+    "type": "Ed25519VerificationKey2020",
+    "publicKeyMultibase": "z6Mkq4o8kZj1nK5z5Y8K8gY7aV9j8jg6YJzqZ6Dj9j7eY4d2",
+}
+
+
+def test_identical():
+    did = encode(DOC)
+    _cached_decode.cache_clear()
+    diff = diff_dids(did, did)
+    assert diff == DocumentDiff()
+    assert not diff
+    assert _cached_decode.cache_info().misses == 0
+
+
+def test_rotation():
+    new_doc = copy.deepcopy(DOC)
+    new_doc["verificationMethod"][1] = NEW_KEY
+    for relationship in (
+        "authentication",
+        "assertionMethod",
+        "capabilityInvocation",
+        "capabilityDelegation",
+    ):
+        new_doc[relationship] = ["#6MkNew"]
+    new_doc["service"][0]["serviceEndpoint"]["uri"] = "https://example.com"
+
+    diff = diff_dids(encode(DOC), encode(new_doc))
+    assert diff
+    assert diff.verification_methods.added == {"#6MkNew": NEW_KEY}
+    assert diff.verification_methods.removed == {
+        "#6MkrCD1c": DOC["verificationMethod"][1]
+    }
+    assert not diff.verification_methods.changed
+    assert diff.relationships["authentication"] == RelationshipDiff(
+        added=("#6MkNew",), removed=("#6MkrCD1c",)
+    )
+    assert "keyAgreement" not in diff.relationships
+    assert list(diff.services.changed) == ["#didcommmessaging-0"]
+    assert diff.properties == ()
+
+
+def test_embedded_and_properties():
+    old_doc = {**DOC, "keyAgreement": [{**NEW_KEY, "id": "#embedded"}]}
+    new_doc = copy.deepcopy(old_doc)
+    new_doc["keyAgreement"][0]["type"] = "Multikey"
+    new_doc["@context"] = DOC["@context"][:1]
+
+    diff = diff_dids(encode(old_doc), encode(new_doc))
+    old_vm, new_vm = diff.verification_methods.changed["#embedded"]
+    assert (old_vm["type"], new_vm["type"]) == (NEW_KEY["type"], "Multikey")
+    assert not diff.relationships
+    assert diff.properties == ("@context",)
+
+
+def test_cached_decodes_not_exposed():
+    old_did = encode(DOC)
+    new_doc = {**DOC, "verificationMethod": DOC["verificationMethod"][:1]}
+    diff = diff_dids(old_did, encode(new_doc))
+    diff.verification_methods.removed["#6MkrCD1c"]["type"] = "Modified"
+    assert diff_dids(old_did, encode(new_doc)) != diff
+    assert _cached_decode(old_did) == DOC
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        diff_dids(encode(DOC), "did:example:123")
+
+    did = encode(DOC)
+    tampered = did[:-1] + ("1" if did[-1] != "1" else "2")
+    with pytest.raises(ValueError):
+        diff_dids(did, tampered)
+    with pytest.raises(ValueError):
+        diff_dids(tampered, tampered)
@@ -0,0 +1,113 @@
+"""Peak and retained memory budgets for the codec paths.
+
+Peak budgets are linear in the length of the long form DID, so that they hold
+across document sizes. Slopes were measured on CPython 3.11 and get a small
+margin; intercepts were measured with coverage enabled, as configured for the
+test run, which adds about 1 KB of fixed overhead. A peak failure means an
+operation started holding more intermediate copies of the document than it used
+to; a retained failure means memory grows with every call.
+"""
+
+import json
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+import did_peer_4
+from did_peer_4 import decode, encode, resolve, resolve_short_from_doc
+from did_peer_4.input_doc import Multikey, input_doc_from_keys_and_services
+
+SIZES = (1, 10, 40)
+MARGIN = 1.12
+RETAINED_ALLOWANCE = 4096
+
+# Measured peak bytes allocated per byte of long form DID, and fixed bytes
+PEAK_BUDGETS = {
+    "encode": (4.66, 1800),
+    "decode": (3.6, 3000),
+    "resolve": (3.6, 3200),
+    "resolve_short_from_doc": (4.6, 3400),
+}
+
+
+def make_doc(size: int) -> dict:
+    return input_doc_from_keys_and_services(
+        [
+            Multikey(
+                multikey="z6MkrCD1csqtgdj8sjrsu8jxcbeyP6m7LiK87NzhfWqio5yr",
+                relationships=["authentication", "assertionMethod"],
+            )
+            for _ in range(size)
+        ],
+        [
+            {
+                "id": f"#didcomm-{index}",
+                "type": "DIDCommMessaging",
+                "serviceEndpoint": f"https://example.com/{index}",
+            }
+            for index in range(size)
+        ],
+    )
+
+
+def measure(operation, arg, repeat: int = 3):
+    """Return peak and retained bytes allocated by calling operation(arg).
+
+    Retained bytes are measured as growth between two batches of calls, once
+    the interpreter's free lists have settled after the first batch.
+    """
+    operation(arg)  # warm up caches and lazily created objects
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        operation(arg)
+        _, peak = tracemalloc.get_traced_memory()
+        for _ in range(repeat):
+            operation(arg)
+        settled, _ = tracemalloc.get_traced_memory()
+        for _ in range(repeat):
+            operation(arg)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before, after - settled
+
+
+def peak_budget(name: str, did: str) -> float:
+    per_byte, fixed = PEAK_BUDGETS[name]
+    return MARGIN * per_byte * len(did) + fixed
+
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("name", PEAK_BUDGETS)
+def test_memory_budget(name: str, size: int):
+    doc = make_doc(size)
+    did = encode(doc)
+    operation, arg = {
+        "encode": (encode, doc),
+        "decode": (decode, did),
+        "resolve": (resolve, did),
+        "resolve_short_from_doc": (resolve_short_from_doc, doc),
+    }[name]
+
+    peak, retained = measure(operation, arg)
+    budget = peak_budget(name, did)
+    print()
+    print(f"{name} size={size} did={len(did)} peak={peak} retained={retained}")
+    assert peak <= budget, f"{name} peak {peak} exceeds budget {budget:.0f}"
+    assert retained <= RETAINED_ALLOWANCE, f"{name} retained {retained} bytes"
+
+
+def test_memory_budget_catches_extra_copy(monkeypatch):
+    """Holding one more copy of the document while loading it busts the budget."""
+
+    def loads(text):
+        copy = text.encode()  # noqa: F841
+        return json.loads(text)
+
+    did = encode(make_doc(SIZES[-1]))
+    monkeypatch.setattr(did_peer_4, "json", SimpleNamespace(loads=loads))
+    peak, _ = measure(decode, did)
+    assert peak > peak_budget("decode", did)
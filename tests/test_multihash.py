@@ -0,0 +1,68 @@
+import hashlib
+
+import pytest
+
+from did_peer_4 import MULTICODEC_SHA2_256, multihash
+
+DATA = b"z" + b"1" * 1024
+
+
+@pytest.mark.parametrize("code", list(multihash.REGISTRY))
+def test_round_trip(code):
+    mh = multihash.encode(code, DATA)
+    decoded_code, digest = multihash.decode(mh)
+    assert decoded_code == code
+    assert digest == multihash.digest(code, DATA)
+    assert multihash.verify(mh, DATA)
+    assert not multihash.verify(mh, DATA + b"1")
+
+
+def test_sha2_256_prefix():
+    assert multihash.encode(multihash.SHA2_256, DATA) == (
+        MULTICODEC_SHA2_256 + hashlib.sha256(DATA).digest()
+    )
+
+
+def test_blake2b_varint_code():
+    mh = multihash.encode(multihash.BLAKE2B_256, DATA)
+    assert mh[:4] == b"\xa0\xe4\x02\x20"
+
+
+def test_verify_view():
+    buffer = b"did:peer:4...:" + DATA
+    view = memoryview(buffer)[len(buffer) - len(DATA) :]
+    assert multihash.verify(multihash.encode(multihash.SHA2_256, DATA), view)
+
+
+def test_register():
+    code = 0x300000
+    multihash.register(code, hashlib.md5, 16)
+    try:
+        mh = multihash.encode(code, DATA)
+        assert multihash.decode(mh) == (code, hashlib.md5(DATA).digest())
+        assert multihash.verify(mh, DATA)
+    finally:
+        del multihash.REGISTRY[code]
+
+
+@pytest.mark.parametrize("code", list(multihash.REGISTRY))
+def test_register_existing(code):
+    before = multihash.REGISTRY[code]
+    with pytest.raises(ValueError):
+        multihash.register(code, hashlib.md5, 16)
+    assert multihash.REGISTRY[code] == before
+
+
+@pytest.mark.parametrize(
+    "mh",
+    [
+        b"",
+        b"\x80",
+        b"\x12\x20" + b"\x00" * 31,
+        b"\x12\x20" + b"\x00" * 33,
+        b"\x01\x20" + b"\x00" * 32,
+    ],
+)
+def test_invalid(mh):
+    with pytest.raises(ValueError):
+        multihash.verify(mh, DATA)
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+from workload import random_short_dids
+
+from did_peer_4 import encode, encode_short, long_to_short
+from did_peer_4.prefilter import ShortDIDFilter
+
+from .test_did_peer_4 import DOC
+
+
+def test_membership():
+    dids = random_short_dids(2000)
+    prefilter = ShortDIDFilter.from_dids(dids, false_positive_rate=0.01)
+    assert len(prefilter) == 2000
+    assert all(did in prefilter for did in dids)
+
+    others = random_short_dids(20000)
+    false_positives = sum(did in prefilter for did in others)
+    assert false_positives / len(others) < 0.03
+    assert prefilter.expected_false_positive_rate == pytest.approx(0.01, rel=0.2)
+    assert 9 < prefilter.bits_per_entry < 10
+
+
+def test_encode_short_and_long_to_short():
+    prefilter = ShortDIDFilter.for_capacity(10)
+    prefilter.add(encode_short(DOC))
+    assert long_to_short(encode(DOC)) in prefilter
+    assert encode(DOC) not in prefilter
+    assert None not in prefilter
+
+
+def test_add_invalid():
+    prefilter = ShortDIDFilter.for_capacity(10)
+    with pytest.raises(ValueError):
+        prefilter.add(encode(DOC))
+
+
+@pytest.mark.parametrize("salt", [b"", b"short", b"x" * 17])
+def test_invalid_salt(salt):
+    with pytest.raises(ValueError):
+        ShortDIDFilter(1024, 3, salt)
+
+
+def test_concurrent_add():
+    dids = random_short_dids(4000)
+    prefilter = ShortDIDFilter.for_capacity(len(dids))
+
+    def add_all(part):
+        for did in part:
+            prefilter.add(did)
+
+    threads = [
+        threading.Thread(target=add_all, args=(dids[offset::8],)) for offset in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(prefilter) == len(dids)
+    assert all(did in prefilter for did in dids)
+
+
+@pytest.mark.parametrize("rate", [0, 1, 1.5])
+def test_invalid_rate(rate):
+    with pytest.raises(ValueError):
+        ShortDIDFilter.for_capacity(10, rate)
+
+
+def test_save_load(tmp_path):
+    dids = random_short_dids(500)
+    prefilter = ShortDIDFilter.from_dids(dids, false_positive_rate=0.001)
+    path = tmp_path / "dids.bloom"
+    prefilter.save(path)
+
+    with ShortDIDFilter.load(path) as loaded:
+        assert len(loaded) == 500
+        assert loaded.size == prefilter.size
+        assert all(did in loaded for did in dids)
+        others = random_short_dids(1000)
+        assert [did in loaded for did in others] == [did in prefilter for did in others]
+        with pytest.raises(ValueError):
+            loaded.add(dids[0])
+
+
+def test_save_load_explicit_salt(tmp_path):
+    dids = random_short_dids(100)
+    salt = bytes(range(16))
+    prefilter = ShortDIDFilter(2048, 7, salt)
+    for did in dids:
+        prefilter.add(did)
+    path = tmp_path / "salted.bloom"
+    prefilter.save(path)
+
+    with ShortDIDFilter.load(path) as loaded:
+        assert loaded.salt == salt
+        assert all(did in loaded for did in dids)
+
+
+@pytest.mark.parametrize("content", [b"", b"DP4BLOOM", b"x" * 64])
+def test_load_invalid(tmp_path, content):
+    path = tmp_path / "invalid.bloom"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        ShortDIDFilter.load(path)
+
+
+def test_load_truncated(tmp_path):
+    path = tmp_path / "truncated.bloom"
+    ShortDIDFilter.for_capacity(100).save(path)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        ShortDIDFilter.load(path)
@@ -0,0 +1,165 @@
+import json
+import socket
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import quote
+
+import pytest
+
+from did_peer_4 import encode, long_to_short, resolve, resolve_short
+from did_peer_4.server import (
+    RESOLUTION_RESULT_CONTENT_TYPE,
+    ResolutionCache,
+    ResolverServer,
+)
+
+from .test_did_peer_4 import DOC
+
+
+@pytest.fixture
+def server():
+    server = ResolverServer(("127.0.0.1", 0), workers=4, max_did_length=2048)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def conn(server):
+    conn = HTTPConnection(*server.server_address, timeout=5)
+    yield conn
+    conn.close()
+
+
+def get(conn: HTTPConnection, did: str, **headers):
+    conn.request("GET", "/1.0/identifiers/" + quote(did, safe=":"), headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_resolve_long(conn):
+    did = encode(DOC)
+    response, body = get(conn, did)
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "application/did+ld+json"
+    assert json.loads(body) == resolve(did)
+
+
+def test_resolve_short_after_long(conn):
+    did = encode(DOC)
+    response, _ = get(conn, long_to_short(did))
+    assert response.status == 404
+
+    get(conn, did)
+    response, body = get(conn, long_to_short(did))
+    assert response.status == 200
+    assert json.loads(body) == resolve_short(did)
+
+
+def test_keep_alive(server, conn):
+    did = encode(DOC)
+    for _ in range(3):
+        response, _ = get(conn, did)
+        assert response.status == 200
+        assert not response.will_close
+    assert server.cache.hits == 2
+
+
+def test_idle_connections_do_not_hold_workers(server):
+    did = encode(DOC)
+    idle = [HTTPConnection(*server.server_address, timeout=5) for _ in range(8)]
+    try:
+        for conn in idle:
+            response, _ = get(conn, did)
+            assert response.status == 200
+
+        conn = HTTPConnection(*server.server_address, timeout=5)
+        start = time.monotonic()
+        response, _ = get(conn, did)
+        assert response.status == 200
+        assert time.monotonic() - start < 1
+        conn.close()
+
+        for conn in idle:
+            response, _ = get(conn, did)
+            assert response.status == 200
+    finally:
+        for conn in idle:
+            conn.close()
+
+
+def test_pipelined_requests(server):
+    did = encode(DOC)
+    request = f"GET /1.0/identifiers/{did} HTTP/1.1\r\nHost: x\r\n\r\n".encode()
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(request * 3)
+        received = b""
+        while received.count(b"HTTP/1.0 200") + received.count(b"HTTP/1.1 200") < 3:
+            chunk = sock.recv(65536)
+            assert chunk
+            received += chunk
+
+
+def test_idle_timeout():
+    server = ResolverServer(("127.0.0.1", 0), workers=1, idle_timeout=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as sock:
+            assert sock.recv(1) == b""
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_resolution_result(conn):
+    did = encode(DOC)
+    response, body = get(conn, did, Accept=RESOLUTION_RESULT_CONTENT_TYPE)
+    assert response.status == 200
+    assert response.getheader("Content-Type") == RESOLUTION_RESULT_CONTENT_TYPE
+    result = json.loads(body)
+    assert result["didDocument"] == resolve(did)
+    assert result["didResolutionMetadata"] == {"contentType": "application/did+ld+json"}
+
+
+@pytest.mark.parametrize(
+    ("did", "headers", "status", "error"),
+    [
+        ("did:example:123", {}, 400, "invalidDid"),
+        ("did:peer:4" + "z" * 4096, {}, 414, "invalidDid"),
+        (encode(DOC), {"Accept": "text/html"}, 406, "representationNotSupported"),
+    ],
+)
+def test_errors(conn, did, headers, status, error):
+    response, body = get(conn, did, **headers)
+    assert response.status == status
+    assert json.loads(body)["didResolutionMetadata"] == {"error": error}
+
+
+def test_request_body_refused(conn):
+    conn.request("GET", "/1.0/identifiers/" + encode(DOC), body=b"x" * 1024)
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 413
+    assert response.will_close
+
+
+def test_unknown_path(conn):
+    conn.request("GET", "/")
+    response = conn.getresponse()
+    response.read()
+    assert response.status == 404
+
+
+def test_cache_eviction():
+    cache = ResolutionCache(max_entries=2)
+    dids = [encode({"index": index}, validate=False) for index in range(3)]
+    for did in dids:
+        cache.resolve(did)
+    assert len(cache) == 2
+    with pytest.raises(LookupError):
+        cache.resolve(long_to_short(dids[0]))
+    assert json.loads(cache.resolve(long_to_short(dids[2]))) == resolve_short(dids[2])
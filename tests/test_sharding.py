@@ -0,0 +1,97 @@
+import json
+from collections import Counter
+
+import pytest
+from workload import random_short_dids
+
+from did_peer_4 import encode, long_to_short, resolve, resolve_short
+from did_peer_4.sharding import (
+    HashRing,
+    InProcessTransport,
+    ShardedResolver,
+    ring_position,
+)
+
+from .test_did_peer_4 import DOC
+
+NODES = [f"node-{index}" for index in range(10)]
+
+
+def test_ring_position():
+    did = encode(DOC)
+    assert ring_position(did) == ring_position(long_to_short(did))
+    with pytest.raises(ValueError):
+        ring_position("did:example:123")
+
+
+def test_balance():
+    ring = HashRing(NODES)
+    dids = random_short_dids(10000)
+    shares = Counter(ring.owner(did) for did in dids)
+    assert set(shares) == set(NODES)
+    assert max(shares.values()) < 2 * len(dids) / len(NODES)
+
+
+def test_rebalance_add_node():
+    ring = HashRing(NODES)
+    dids = random_short_dids(10000)
+    before = {did: ring.owner(did) for did in dids}
+
+    ring.add_node("node-new")
+    moved = [did for did in dids if ring.owner(did) != before[did]]
+    assert all(ring.owner(did) == "node-new" for did in moved)
+    assert len(moved) / len(dids) < 2 / (len(NODES) + 1)
+
+
+def test_rebalance_remove_node():
+    ring = HashRing(NODES)
+    dids = random_short_dids(10000)
+    before = {did: ring.owner(did) for did in dids}
+
+    ring.remove_node("node-3")
+    assert "node-3" not in ring.nodes
+    moved = [did for did in dids if ring.owner(did) != before[did]]
+    assert all(before[did] == "node-3" for did in moved)
+
+
+def test_ring_errors():
+    ring = HashRing(["a"])
+    with pytest.raises(ValueError):
+        ring.add_node("a")
+    with pytest.raises(ValueError):
+        ring.remove_node("b")
+    ring.remove_node("a")
+    with pytest.raises(LookupError):
+        ring.owner(encode(DOC))
+
+
+def test_sharded_resolver():
+    transport = InProcessTransport()
+    resolver = ShardedResolver(HashRing(NODES), transport)
+    did = encode(DOC)
+    short = long_to_short(did)
+    assert resolver.cached(did) is None
+
+    assert json.loads(resolver.resolve_json(did)) == resolve(did)
+    assert json.loads(resolver.resolve_short_json(did)) == resolve_short(did)
+    assert json.loads(resolver.cached(short)) == resolve_short(did)
+
+    # Both forms live on the owning node only
+    owner = resolver.ring.owner(did)
+    assert list(transport.caches) == [owner]
+    assert set(transport.caches[owner]) == {did, short}
+    assert resolver.resolve_json(did) is transport.caches[owner][did]
+
+
+def test_sharded_resolver_tampered_did():
+    resolver = ShardedResolver(HashRing(NODES), InProcessTransport())
+    did = encode(DOC)
+    other = encode({**DOC, "alsoKnownAs": ["did:example:other"]})
+    tampered = did[: did.index(":", 10)] + other[other.index(":", 10) :]
+    assert long_to_short(tampered) == long_to_short(did)
+
+    resolver.resolve_short_json(did)
+    with pytest.raises(ValueError):
+        resolver.resolve_short_json(tampered)
+    with pytest.raises(ValueError):
+        resolver.resolve_json(tampered)
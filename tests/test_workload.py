@@ -0,0 +1,70 @@
+import io
+import math
+
+import pytest
+from replay import percentile
+from workload import (
+    WorkloadConfig,
+    dump_population,
+    generate_population,
+    generate_requests,
+    load_population,
+)
+
+from did_peer_4 import long_to_short, resolve
+
+CONFIG = WorkloadConfig(population=20, seed=3)
+
+
+def stream(population, config, count=200):
+    requests = generate_requests(population, config)
+    return [
+        (operation, peer.long)
+        for operation, peer in (next(requests) for _ in range(count))
+    ]
+
+
+def test_same_seed_same_workload():
+    population = generate_population(CONFIG)
+    assert generate_population(CONFIG) == population
+    assert stream(population, CONFIG) == stream(generate_population(CONFIG), CONFIG)
+
+    other = WorkloadConfig(population=20, seed=4)
+    assert generate_population(other) != population
+    assert stream(population, other) != stream(population, CONFIG)
+
+
+def test_population_is_valid():
+    for peer in generate_population(CONFIG):
+        assert peer.short == long_to_short(peer.long)
+        assert resolve(peer.long)["alsoKnownAs"] == [peer.short]
+
+
+def test_dump_load_population():
+    population = generate_population(CONFIG)
+    out = io.StringIO()
+    dump_population(population, out)
+    out.seek(0)
+    assert load_population(out) == population
+
+
+@pytest.mark.parametrize(
+    ("values", "fraction", "expected"),
+    [
+        (range(1, 101), 0.5, 50),
+        (range(1, 101), 0.99, 99),
+        (range(1, 101), 0.999, 100),
+        (range(1, 101), 0.07, 7),
+        (range(1, 1001), 0.999, 999),
+        (range(1, 6), 0.5, 3),
+        (range(1, 11), 0.25, 3),
+        ([42], 0.999, 42),
+        ([1, 2], 0, 1),
+    ],
+)
+def test_percentile(values, fraction, expected):
+    assert percentile([float(value) for value in values], fraction) == expected
+
+
+def test_percentile_empty():
+    assert math.isnan(percentile([], 0.5))